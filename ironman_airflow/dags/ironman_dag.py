@@ -1,12 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import io
 
+import pandas as pd
+
 from airflow import DAG
+from airflow.exceptions import AirflowException
 from airflow.providers.standard.operators.python import PythonOperator
-from airflow.sdk import TaskGroup
+from airflow.sdk import BaseOperator, TaskGroup, Variable
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.providers.amazon.aws.hooks.s3 import S3Hook
+from airflow.providers.databricks.hooks.databricks import DatabricksHook, RunState
 from airflow.providers.databricks.operators.databricks import DatabricksRunNowOperator
+from airflow.providers.databricks.triggers.databricks import DatabricksExecutionTrigger
 
 
 S3_BUCKET = ""
@@ -19,6 +24,9 @@ DATABRICKS_CONN_ID = "databricks_default"
 
 
 DATABRICKS_JOB_ID = ""
+DATABRICKS_POLLING_PERIOD_SECONDS = 30
+# Task that triggers the Databricks job and pushes its run_id XCom for the wait task
+DATABRICKS_TRIGGER_TASK_ID = "trigger_databricks_pipeline"
 
 
 TABLES_CONFIG = [
@@ -33,6 +41,14 @@ TABLES_CONFIG = [
 LATEST_YEAR = max(c["year"] for c in TABLES_CONFIG)
 
 
+# Incremental extract: rows with watermark column > last stored value go to a timestamped delta file
+EXTRACT_MODES = ["full", "incremental"]
+DEFAULT_WATERMARK_COLUMN = "updated_at"
+# Stable row identity shared by every table; also passed to Bronze, which keys re-keyed races by it
+PRIMARY_KEY_COLUMN = "id"
+WATERMARK_VARIABLE_PREFIX = "ironman_extract_watermark"
+
+
 
 
 def _get_process_year(context) -> int:
@@ -42,8 +58,26 @@ def _get_process_year(context) -> int:
         raise ValueError("process_year is required. Trigger the DAG with e.g. {'process_year': 2024}")
     return int(year)
 
-def extract_and_upload_to_s3(table_name: str, filename: str, year: int, gender: str, **context):
+def _get_extract_mode(context) -> str:
+    conf = (context.get("dag_run").conf or {}) if context.get("dag_run") else {}
+    mode = str(conf.get("extract_mode", "full")).lower().strip()
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"Invalid extract_mode: {mode}. Must be one of {EXTRACT_MODES}")
+    return mode
+
+def _watermark_variable_key(table_name: str) -> str:
+    return f"{WATERMARK_VARIABLE_PREFIX}__{table_name}"
+
+def extract_and_upload_to_s3(
+    table_name: str,
+    filename: str,
+    year: int,
+    gender: str,
+    watermark_column: str = DEFAULT_WATERMARK_COLUMN,
+    **context,
+):
     selected_year = _get_process_year(context)
+    extract_mode = _get_extract_mode(context)
 
     if int(year) != int(selected_year):
         print("=" * 60)
@@ -52,23 +86,59 @@ def extract_and_upload_to_s3(table_name: str, filename: str, year: int, gender:
         return {"status": "skipped", "table": table_name, "year": year, "gender": gender}
 
     print("=" * 60)
-    print(f"TASK: Extract {table_name} and Upload to S3")
+    print(f"TASK: Extract {table_name} and Upload to S3 ({extract_mode})")
     print("=" * 60)
 
+    watermark_key = _watermark_variable_key(table_name)
+    watermark = None
+    if extract_mode == "incremental":
+        state = Variable.get(watermark_key, default=None, deserialize_json=True) or {}
+        if state.get("column") == watermark_column:
+            watermark = state.get("value")
+        print(f"High-water mark ({watermark_column}): {watermark if watermark is not None else '(none, initial load)'}")
+
    
     print(f"\n[1/3] Connecting to RDS...")
     pg_hook = PostgresHook(postgres_conn_id=RDS_CONN_ID)
 
-    sql = f'SELECT * FROM "{table_name}"'
+    if watermark is not None:
+        sql = f'SELECT * FROM "{table_name}" WHERE "{watermark_column}" > %(watermark)s'
+        parameters = {"watermark": watermark}
+    else:
+        sql = f'SELECT * FROM "{table_name}"'
+        parameters = None
     print(f"Executing: {sql}")
 
-    df = pg_hook.get_pandas_df(sql)
+    df = pg_hook.get_pandas_df(sql, parameters=parameters)
     row_count = len(df)
     print(f"Extracted {row_count:,} rows from {table_name}")
 
+    if row_count == 0 and watermark is not None:
+        print(f"No rows changed since {watermark}, nothing to upload")
+        return {
+            "table": table_name,
+            "rows": 0,
+            "year": year,
+            "gender": gender,
+            "watermark": watermark,
+            "status": "no_changes",
+        }
+
     if row_count == 0:
         raise ValueError(f"No data found in table {table_name}")
 
+    if extract_mode == "incremental":
+        for col in (watermark_column, PRIMARY_KEY_COLUMN):
+            if col not in df.columns:
+                raise ValueError(f"Column {col} required for incremental extract not found in table {table_name}")
+
+        max_watermark = df[watermark_column].max()
+        if pd.isna(max_watermark):
+            raise ValueError(
+                f"Watermark column {watermark_column} in table {table_name} has no non-null values; "
+                "cannot advance the high-water mark"
+            )
+
     print(f"\n[2/3] Converting to CSV...")
     csv_buffer = io.StringIO()
     df.to_csv(csv_buffer, index=False)
@@ -77,16 +147,29 @@ def extract_and_upload_to_s3(table_name: str, filename: str, year: int, gender:
     print(f"CSV size: {csv_size:,} bytes")
 
     print(f"\n[3/3] Uploading to S3...")
-    s3_key = f"{S3_PREFIX}/year={selected_year}/{filename}"
+    if watermark is not None:
+        # Delta files sit next to the base file: <stem>__delta_<utc timestamp>.csv
+        stem = filename.rsplit(".", 1)[0]
+        extracted_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        s3_key = f"{S3_PREFIX}/year={selected_year}/{stem}__delta_{extracted_at}.csv"
+    else:
+        s3_key = f"{S3_PREFIX}/year={selected_year}/{filename}"
 
     s3_hook = S3Hook(aws_conn_id=AWS_CONN_ID)
     s3_hook.load_string(
         string_data=csv_content,
         key=s3_key,
         bucket_name=S3_BUCKET,
-        replace=False, 
+        # An incremental initial load is a fresh snapshot, so it may replace an older base file
+        replace=(extract_mode == "incremental"),
     )
 
+    new_watermark = watermark
+    if extract_mode == "incremental":
+        new_watermark = str(max_watermark)
+        Variable.set(watermark_key, {"column": watermark_column, "value": new_watermark}, serialize_json=True)
+        print(f"High-water mark advanced to {new_watermark}")
+
     s3_path = f"s3://{S3_BUCKET}/{s3_key}"
     print(f"\nSuccessfully uploaded to {s3_path}")
     print(f"   Rows: {row_count:,}")
@@ -99,6 +182,7 @@ def extract_and_upload_to_s3(table_name: str, filename: str, year: int, gender:
         "size_bytes": csv_size,
         "year": year,
         "gender": gender,
+        "watermark": new_watermark,
         "status": "success",
     }
 
@@ -153,6 +237,111 @@ def validate_s3_files(**context):
         "total_size_bytes": total_size,
     }
 
+def summarize_databricks_run(run: dict) -> dict:
+    """
+    Reduce a Jobs API runs/get response to per-task state and durations.
+    """
+    def _duration_seconds(item: dict):
+        start_ms = item.get("start_time") or 0
+        end_ms = item.get("end_time") or 0
+        if start_ms and end_ms:
+            return round((end_ms - start_ms) / 1000, 1)
+        total_ms = sum(item.get(k) or 0 for k in ("setup_duration", "execution_duration", "cleanup_duration"))
+        return round(total_ms / 1000, 1) if total_ms else None
+
+    tasks = []
+    for task in sorted(run.get("tasks", []), key=lambda t: t.get("start_time") or 0):
+        state = task.get("state", {})
+        tasks.append({
+            "task_key": task.get("task_key"),
+            "run_id": task.get("run_id"),
+            "life_cycle_state": state.get("life_cycle_state"),
+            "result_state": state.get("result_state"),
+            "state_message": state.get("state_message"),
+            "duration_seconds": _duration_seconds(task),
+        })
+
+    state = run.get("state", {})
+    return {
+        "run_id": run.get("run_id"),
+        "run_page_url": run.get("run_page_url"),
+        "life_cycle_state": state.get("life_cycle_state"),
+        "result_state": state.get("result_state"),
+        "duration_seconds": _duration_seconds(run),
+        "tasks": tasks,
+    }
+
+class DatabricksRunWaitOperator(BaseOperator):
+    """
+    Waits for an already triggered Databricks run on the triggerer (deferrable),
+    then returns the per-task run summary as XCom.
+    """
+
+    template_fields = ("run_id",)
+
+    def __init__(
+        self,
+        *,
+        run_id: str,
+        databricks_conn_id: str = DATABRICKS_CONN_ID,
+        polling_period_seconds: int = DATABRICKS_POLLING_PERIOD_SECONDS,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.run_id = run_id
+        self.databricks_conn_id = databricks_conn_id
+        self.polling_period_seconds = polling_period_seconds
+
+    def _hook(self) -> DatabricksHook:
+        return DatabricksHook(self.databricks_conn_id, caller=self.__class__.__name__)
+
+    def execute(self, context):
+        # A missing XCom renders the run_id template as "None"
+        if not str(self.run_id).strip().isdigit():
+            raise AirflowException(
+                f"No Databricks run_id to wait for (got {self.run_id!r}). Expected the run_id XCom "
+                f"pushed by {DATABRICKS_TRIGGER_TASK_ID}; check that task ran with wait_for_termination=False."
+            )
+        run_id = int(self.run_id)
+        run_state = self._hook().get_run_state(run_id)
+
+        if run_state.is_terminal:
+            return self._finish(run_id, run_state)
+
+        print(f"Databricks run {run_id} is {run_state.life_cycle_state}, deferring to triggerer")
+        self.defer(
+            trigger=DatabricksExecutionTrigger(
+                run_id=run_id,
+                databricks_conn_id=self.databricks_conn_id,
+                polling_period_seconds=self.polling_period_seconds,
+                caller=self.__class__.__name__,
+            ),
+            method_name="execute_complete",
+        )
+
+    def execute_complete(self, context, event: dict):
+        run_state = RunState.from_json(event["run_state"])
+        for error in event.get("errors") or []:
+            print(f"Databricks task error: {error}")
+        return self._finish(int(event["run_id"]), run_state)
+
+    def _finish(self, run_id: int, run_state: RunState) -> dict:
+        summary = summarize_databricks_run(self._hook().get_run(run_id))
+
+        print("=" * 60)
+        print(f"Databricks run {run_id}: {run_state.life_cycle_state} / {run_state.result_state}")
+        print("=" * 60)
+        for task in summary["tasks"]:
+            print(f"  {task['task_key']}: {task['result_state']} ({task['duration_seconds']}s)")
+
+        if not run_state.is_successful:
+            raise AirflowException(
+                f"Databricks run {run_id} failed with state {run_state.result_state}: "
+                f"{run_state.state_message}. See {summary['run_page_url']}"
+            )
+
+        return summary
+
 def notify_success(**context):
     print("=" * 60)
     print("PIPELINE SUCCESS")
@@ -167,9 +356,22 @@ def notify_success(**context):
     print(f"Execution Date: {execution_date}")
     print(f"Run ID: {dag_run.run_id}")
     print(f"Processed Year: {selected_year}")
+
+    databricks_run = context["ti"].xcom_pull(task_ids="wait_for_databricks_pipeline") or {}
+    if databricks_run:
+        print(f"\nDatabricks Run: {databricks_run.get('run_page_url')}")
+        print(f"Databricks Duration: {databricks_run.get('duration_seconds')}s")
+        for task in databricks_run.get("tasks", []):
+            print(f"  {task['task_key']}: {task['result_state']} ({task['duration_seconds']}s)")
+
     print("\nAll tasks completed successfully!")
 
-    return {"status": "success", "process_year": selected_year}
+    return {
+        "status": "success",
+        "process_year": selected_year,
+        "databricks_run_id": databricks_run.get("run_id"),
+        "databricks_tasks": databricks_run.get("tasks", []),
+    }
 
 def notify_failure(context):
     """
@@ -209,6 +411,7 @@ with DAG(
                     "filename": config["filename"],
                     "year": config["year"],
                     "gender": config["gender"],
+                    "watermark_column": config.get("watermark_column", DEFAULT_WATERMARK_COLUMN),
                 },
             )
 
@@ -218,7 +421,7 @@ with DAG(
     )
 
     trigger_databricks = DatabricksRunNowOperator(
-        task_id="trigger_databricks_pipeline",
+        task_id=DATABRICKS_TRIGGER_TASK_ID,
         databricks_conn_id=DATABRICKS_CONN_ID,
         job_id=DATABRICKS_JOB_ID,
 
@@ -228,12 +431,20 @@ with DAG(
         notebook_params={
             "run_mode": "{{ dag_run.conf.get('run_mode', 'incremental') }}",
             "process_year": "{{ dag_run.conf.get('process_year', '" + str(LATEST_YEAR) + "') }}",
+            "bronze_mode": "{{ dag_run.conf.get('bronze_mode', 'batch') }}",
+            "source_key_col": PRIMARY_KEY_COLUMN,
             "triggered_by": "airflow",
             "execution_date": "{{ ds }}",
         },
 
-        wait_for_termination=True,
-        polling_period_seconds=30,
+        wait_for_termination=False,
+    )
+
+    wait_for_databricks = DatabricksRunWaitOperator(
+        task_id="wait_for_databricks_pipeline",
+        run_id="{{ ti.xcom_pull(task_ids='" + DATABRICKS_TRIGGER_TASK_ID + "', key='run_id') }}",
+        databricks_conn_id=DATABRICKS_CONN_ID,
+        polling_period_seconds=DATABRICKS_POLLING_PERIOD_SECONDS,
     )
     success = PythonOperator(
         task_id="notify_success",
@@ -241,4 +452,4 @@ with DAG(
     )
 
 
-    extract_upload_group >> validate >> trigger_databricks >> success
+    extract_upload_group >> validate >> trigger_databricks >> wait_for_databricks >> success
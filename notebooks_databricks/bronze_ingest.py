@@ -0,0 +1,172 @@
+"""
+Landing-file ingestion helpers for the streaming bronze mode of 02_bronze.
+
+Kept in a plain module so the file discovery can run on local Spark against a
+directory, outside Databricks.
+"""
+
+from pyspark.sql import functions as F
+from pyspark.sql.types import (
+    BinaryType, IntegerType, LongType, StringType, StructField, StructType, TimestampType
+)
+
+
+FILE_LOG_DIR = "_file_log"
+
+# Fixed schema of the binaryFile source; streaming sources must be given it up front
+BINARY_FILE_SCHEMA = StructType([
+    StructField("path", StringType(), False),
+    StructField("modificationTime", TimestampType(), False),
+    StructField("length", LongType(), False),
+    StructField("content", BinaryType(), True),
+])
+
+
+def null_dash_values(df):
+    for col_name in df.columns:
+        df = df.withColumn(
+            col_name,
+            F.when(F.col(col_name) == "-", None).otherwise(F.col(col_name))
+        )
+    return df
+
+
+def add_path_metadata(df):
+    # Landing layout is <landing>/year=<yyyy>/<yyyy>_<men|women>[...].csv
+    file_name = F.lower(F.regexp_extract(F.col("source_file"), r"([^/]+)$", 1))
+    gender = F.regexp_extract(file_name, r"(?:^|[_-])(women|men)(?:[_.-])", 1)
+
+    return (
+        df
+        .withColumn("year", F.regexp_extract(F.col("source_file"), r"year=(\d{4})", 1).cast(IntegerType()))
+        .withColumn(
+            "source_gender",
+            F.when(gender == "women", "F").when(gender == "men", "M").otherwise(F.lit(None).cast(StringType()))
+        )
+        .withColumn("load_timestamp", F.current_timestamp())
+        .withColumn("load_date", F.current_date())
+    )
+
+
+def read_landing_files(spark, paths):
+    # Each file is read with its own header, so column order and extra columns may differ per file
+    df = None
+    for path in paths:
+        file_df = (
+            spark.read
+            .option("header", "true")
+            .option("inferSchema", "false")
+            .csv(path)
+            .withColumn("source_file", F.lit(path).cast(StringType()))
+        )
+        df = file_df if df is None else df.unionByName(file_df, allowMissingColumns=True)
+
+    df = add_path_metadata(null_dash_values(df))
+
+    untagged = [
+        r["source_file"] for r in
+        df.filter(F.col("year").isNull() | F.col("source_gender").isNull())
+        .select("source_file").distinct().collect()
+    ]
+    if untagged:
+        raise ValueError(f"Cannot derive year/gender from landing path for: {untagged}")
+
+    return df
+
+
+def list_landing_files(spark, landing_path: str):
+    return (
+        spark.read
+        .format("binaryFile")
+        .option("pathGlobFilter", "*.csv")
+        .option("recursiveFileLookup", "true")
+        .load(landing_path)
+        .select("path", "modificationTime")
+    )
+
+
+def _path_exists(spark, path: str) -> bool:
+    jvm_path = spark._jvm.org.apache.hadoop.fs.Path(path)
+    return jvm_path.getFileSystem(spark._jsc.hadoopConfiguration()).exists(jvm_path)
+
+
+def ingest_new_landing_files(spark, landing_path: str, checkpoint_path: str, process_batch,
+                             use_auto_loader: bool = False):
+    """
+    Stream new CSV files under landing_path into process_batch(df, batch_id), once per file.
+
+    Files are discovered by a checkpointed stream (Auto Loader on Databricks, the plain
+    file source elsewhere) with trigger(availableNow=True), then read by header.
+    Overwritten files are ingested again: Auto Loader via cloudFiles.allowOverwrites, the
+    plain file source (which tracks paths only) via a modification-time log kept next to
+    the checkpoint. Returns the ingested paths.
+    """
+    file_log_path = f"{checkpoint_path}/{FILE_LOG_DIR}"
+    ingested = []
+
+    def log_files(files_df):
+        if not use_auto_loader:
+            files_df.write.mode("append").parquet(file_log_path)
+
+    def ingest(files, batch_id):
+        paths = sorted({r["path"] for r in files})
+        print(f"Batch {batch_id}: {len(paths)} new file(s): {paths}")
+        process_batch(read_landing_files(spark, paths), batch_id)
+        ingested.extend(paths)
+
+    def write_batch(batch_df, batch_id):
+        files = batch_df.collect()
+        if not files:
+            return
+        ingest(files, batch_id)
+        log_files(batch_df)
+
+    if use_auto_loader:
+        files_stream = (
+            spark.readStream
+            .format("cloudFiles")
+            .option("cloudFiles.format", "binaryFile")
+            .option("cloudFiles.allowOverwrites", "true")
+            .option("pathGlobFilter", "*.csv")
+            .load(landing_path)
+        )
+    else:
+        files_stream = (
+            spark.readStream
+            .format("binaryFile")
+            .schema(BINARY_FILE_SCHEMA)
+            .option("pathGlobFilter", "*.csv")
+            .option("recursiveFileLookup", "true")
+            .load(landing_path)
+        )
+
+    query = (
+        files_stream
+        .select("path", "modificationTime")
+        .writeStream
+        .foreachBatch(write_batch)
+        .option("checkpointLocation", checkpoint_path)
+        .trigger(availableNow=True)
+        .start()
+    )
+    query.awaitTermination()
+
+    if not use_auto_loader and _path_exists(spark, file_log_path):
+        logged = (
+            spark.read.parquet(file_log_path)
+            .groupBy("path")
+            .agg(F.max("modificationTime").alias("logged_modification_time"))
+        )
+        relanded_df = (
+            list_landing_files(spark, landing_path)
+            .join(logged, "path")
+            .filter(F.col("modificationTime") > F.col("logged_modification_time"))
+            .select("path", "modificationTime")
+        )
+        relanded = relanded_df.collect()
+        if relanded:
+            print(f"Re-landed file(s) since last ingest: {[r['path'] for r in relanded]}")
+            ingest(relanded, "relanded")
+            log_files(spark.createDataFrame(relanded, relanded_df.schema))
+
+    return ingested
@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pyspark")
+
+from bronze_ingest import ingest_new_landing_files
+
+
+MEN_CSV = "rank,athlete_name,country,swim_time\n1,Matt Jackson,US,0:50:01\n2,Peng Liu,-,0:51:10\n"
+WOMEN_CSV = "athlete_name,rank,updated_at,country\nSusan Smith,1,2025-01-01 00:00:00,GB\n"
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def landing(tmp_path):
+    landing_path = tmp_path / "landing"
+    landing_path.mkdir()
+    return str(landing_path), str(tmp_path / "checkpoint")
+
+
+def run_ingest(spark, landing_path, checkpoint_path):
+    batches = []
+    paths = ingest_new_landing_files(
+        spark, landing_path, checkpoint_path, lambda df, batch_id: batches.append(df.collect())
+    )
+    return paths, [row for batch in batches for row in batch]
+
+
+def test_ingests_each_file_once(spark, landing):
+    landing_path, checkpoint_path = landing
+    write_file(f"{landing_path}/year=2024/2024_men.csv", MEN_CSV)
+    write_file(f"{landing_path}/year=2024/2024_women.csv", WOMEN_CSV)
+
+    paths, rows = run_ingest(spark, landing_path, checkpoint_path)
+
+    assert len(paths) == 2
+    assert len(rows) == 3
+    by_name = {r["athlete_name"]: r for r in rows}
+    assert (by_name["Matt Jackson"]["year"], by_name["Matt Jackson"]["source_gender"]) == (2024, "M")
+    assert by_name["Peng Liu"]["country"] is None
+    # Columns are matched by header name, not position
+    assert (by_name["Susan Smith"]["source_gender"], by_name["Susan Smith"]["country"]) == ("F", "GB")
+    assert by_name["Susan Smith"]["updated_at"] == "2025-01-01 00:00:00"
+
+    paths, rows = run_ingest(spark, landing_path, checkpoint_path)
+
+    assert paths == []
+    assert rows == []
+
+
+def test_relanded_file_is_ingested_again(spark, landing):
+    landing_path, checkpoint_path = landing
+    men_path = f"{landing_path}/year=2024/2024_men.csv"
+    write_file(men_path, MEN_CSV)
+    write_file(f"{landing_path}/year=2024/2024_women.csv", WOMEN_CSV)
+    run_ingest(spark, landing_path, checkpoint_path)
+
+    write_file(men_path, MEN_CSV.replace("0:50:01", "0:49:59"))
+    later = time.time() + 5
+    os.utime(men_path, (later, later))
+
+    paths, rows = run_ingest(spark, landing_path, checkpoint_path)
+
+    assert [os.path.basename(p) for p in paths] == ["2024_men.csv"]
+    assert {r["athlete_name"]: r["swim_time"] for r in rows}["Matt Jackson"] == "0:49:59"
+
+    paths, rows = run_ingest(spark, landing_path, checkpoint_path)
+
+    assert paths == []
+
+
+def test_empty_landing_directory(spark, landing):
+    landing_path, checkpoint_path = landing
+
+    paths, rows = run_ingest(spark, landing_path, checkpoint_path)
+
+    assert paths == []
+    assert rows == []
+
+
+def test_untagged_path_is_rejected(spark, landing):
+    landing_path, checkpoint_path = landing
+    write_file(f"{landing_path}/misc/results.csv", MEN_CSV)
+
+    with pytest.raises(Exception, match="Cannot derive year/gender"):
+        run_ingest(spark, landing_path, checkpoint_path)
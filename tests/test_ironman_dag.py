@@ -0,0 +1,133 @@
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("airflow")
+pytest.importorskip("airflow.providers.databricks")
+pytest.importorskip("airflow.providers.amazon")
+pytest.importorskip("airflow.providers.postgres")
+
+from airflow.exceptions import AirflowException, TaskDeferred
+from airflow.providers.databricks.hooks.databricks import DatabricksHook, RunState
+from airflow.providers.databricks.triggers.databricks import DatabricksExecutionTrigger
+
+from ironman_dag import DatabricksRunWaitOperator, summarize_databricks_run
+
+
+RUN_ID = 42
+
+# Trimmed Jobs API runs/get response
+RUN_PAYLOAD = {
+    "run_id": RUN_ID,
+    "run_page_url": "https://example.cloud.databricks.com/#job/1/run/42",
+    "start_time": 1_700_000_000_000,
+    "end_time": 1_700_000_090_500,
+    "state": {"life_cycle_state": "TERMINATED", "result_state": "SUCCESS", "state_message": ""},
+    "tasks": [
+        {
+            "task_key": "bronze",
+            "run_id": 102,
+            "start_time": 1_700_000_030_000,
+            "end_time": 1_700_000_060_000,
+            "state": {"life_cycle_state": "TERMINATED", "result_state": "SUCCESS", "state_message": ""},
+        },
+        {
+            "task_key": "config",
+            "run_id": 101,
+            "start_time": 1_700_000_000_000,
+            "setup_duration": 2_000,
+            "execution_duration": 20_000,
+            "cleanup_duration": 500,
+            "state": {"life_cycle_state": "TERMINATED", "result_state": "SUCCESS", "state_message": ""},
+        },
+    ],
+}
+
+SUCCESS = RunState("TERMINATED", "SUCCESS", "")
+FAILED = RunState("TERMINATED", "FAILED", "Task bronze failed")
+RUNNING = RunState("RUNNING", "", "In run")
+
+
+@pytest.fixture
+def jobs_api():
+    with mock.patch.object(DatabricksHook, "get_run_state") as get_run_state, \
+            mock.patch.object(DatabricksHook, "get_run", return_value=RUN_PAYLOAD) as get_run:
+        yield get_run_state, get_run
+
+
+def make_operator(run_id=str(RUN_ID)):
+    return DatabricksRunWaitOperator(task_id="wait_for_databricks_pipeline", run_id=run_id)
+
+
+def test_summary_duration_from_start_and_end_time():
+    summary = summarize_databricks_run(RUN_PAYLOAD)
+
+    assert summary["run_id"] == RUN_ID
+    assert summary["result_state"] == "SUCCESS"
+    assert summary["duration_seconds"] == 90.5
+    assert [t["task_key"] for t in summary["tasks"]] == ["config", "bronze"]
+    assert summary["tasks"][1]["duration_seconds"] == 30.0
+
+
+def test_summary_duration_from_setup_execution_cleanup():
+    config_task = summarize_databricks_run(RUN_PAYLOAD)["tasks"][0]
+
+    assert config_task["task_key"] == "config"
+    assert config_task["duration_seconds"] == 22.5
+
+
+def test_summary_without_timings():
+    summary = summarize_databricks_run({"run_id": RUN_ID, "state": {}, "tasks": [{"task_key": "silver"}]})
+
+    assert summary["duration_seconds"] is None
+    assert summary["tasks"][0]["duration_seconds"] is None
+
+
+def test_finished_run_returns_summary_without_deferring(jobs_api):
+    get_run_state, get_run = jobs_api
+    get_run_state.return_value = SUCCESS
+
+    summary = make_operator().execute(context={})
+
+    get_run_state.assert_called_once_with(RUN_ID)
+    get_run.assert_called_once_with(RUN_ID)
+    assert summary["run_page_url"] == RUN_PAYLOAD["run_page_url"]
+    assert len(summary["tasks"]) == 2
+
+
+def test_running_run_defers_to_execution_trigger(jobs_api):
+    get_run_state, get_run = jobs_api
+    get_run_state.return_value = RUNNING
+
+    with pytest.raises(TaskDeferred) as deferred:
+        make_operator().execute(context={})
+
+    assert isinstance(deferred.value.trigger, DatabricksExecutionTrigger)
+    assert deferred.value.trigger.run_id == RUN_ID
+    assert deferred.value.method_name == "execute_complete"
+    get_run.assert_not_called()
+
+
+def test_execute_complete_returns_summary_on_success(jobs_api):
+    event = {"run_id": RUN_ID, "run_state": SUCCESS.to_json(), "errors": []}
+
+    summary = make_operator().execute_complete(context={}, event=event)
+
+    assert summary["result_state"] == "SUCCESS"
+
+
+def test_execute_complete_raises_on_failed_run(jobs_api):
+    event = {"run_id": RUN_ID, "run_state": FAILED.to_json(), "errors": [{"task_key": "bronze"}]}
+
+    with pytest.raises(AirflowException, match="failed with state FAILED"):
+        make_operator().execute_complete(context={}, event=event)
+
+
+@pytest.mark.parametrize("run_id", ["None", "", None])
+def test_missing_run_id_xcom_names_trigger_task(jobs_api, run_id):
+    get_run_state, _ = jobs_api
+
+    with pytest.raises(AirflowException, match="trigger_databricks_pipeline"):
+        make_operator(run_id).execute(context={})
+
+    get_run_state.assert_not_called()